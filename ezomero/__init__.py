@@ -13,7 +13,8 @@ from ._misc import (filter_by_filename,
                     print_groups,
                     print_projects,
                     print_datasets)
-from ._importer import (ezimport)
+from ._importer import (ezimport,
+                        ezimport_many)
 from ._posts import (post_dataset,
                      post_image,
                      post_map_annotation,
@@ -88,6 +89,7 @@ __all__ = ['post_dataset',
            'print_projects',
            'print_datasets',
            'ezimport',
+           'ezimport_many',
            'connect',
            'store_connection_params',
            'set_group']
@@ -1,17 +1,24 @@
+import functools
 import logging
-from typing import Optional, Union, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union, List, Dict
 from os.path import abspath
 from omero.rtypes import rstring
 from omero.sys import Parameters
 from omero.gateway import MapAnnotationWrapper, BlitzGateway
+from omero.model import MapAnnotationI, ImageI, PlateI
+from omero.model import ImageAnnotationLinkI, PlateAnnotationLinkI
 from ._gets import get_image_ids
 from ._posts import post_dataset, post_project, post_screen
-from ._misc import link_images_to_dataset
-from ._misc import link_plates_to_screen
-from omero.cli import CLI
-from omero.plugins.sessions import SessionsControl
+from ._misc import _batch_link_images_to_dataset
+from ._misc import _batch_link_plates_to_screen
 from importlib import import_module
-ImportControl = import_module("omero.plugins.import").ImportControl
+
+_ANN_LINK_TYPES = {'image': (ImageI, ImageAnnotationLinkI),
+                   'plate': (PlateI, PlateAnnotationLinkI)}
+
+# ids of containers created by set_or_create_*, keyed by session and name
+_created_containers: Dict[tuple, int] = {}
 
 
 # import
@@ -62,6 +69,10 @@ def ezimport(conn: BlitzGateway, target: str,
     imp_ctl = Importer(conn, target, project, dataset, screen,
                        ann, ns, *args, **kwargs)
     imp_ctl.ezimport()
+    return _organize_import(imp_ctl)
+
+
+def _organize_import(imp_ctl: "Importer") -> Union[List[int], None]:
     if imp_ctl.screen:
         imp_ctl.get_plate_ids()
         imp_ctl.organize_plates()
@@ -75,12 +86,120 @@ def ezimport(conn: BlitzGateway, target: str,
         return imp_ctl.image_ids
 
 
+def ezimport_many(conn: BlitzGateway, targets: List[str],
+                  project: Optional[Union[str, int]] = None,
+                  dataset: Optional[Union[str, int]] = None,
+                  screen: Optional[Union[str, int]] = None,
+                  ann: Optional[dict] = None,
+                  ns: Optional[str] = None, *args: str,
+                  max_workers: int = 4,
+                  **kwargs: str
+                  ) -> List[Union[List[int], None]]:
+    """Import several targets concurrently, using ``ezimport`` for each.
+
+    Parameters
+    ----------
+    conn : ``omero.gateway.BlitzGateway`` object.
+        OMERO connection.
+    targets : list of strings
+        Paths to the import targets to be imported into OMERO.
+    project : str or int, optional
+        The name or ID of the Project data will be imported into.
+    dataset : str or int, optional
+        The name or ID of the Dataset data will be imported into.
+    screen : str or int, optional
+        The name or ID of the Screen data will be imported into.
+    ann : dict, optional
+        Dictionary with key-value pairs to be added to imported images.
+    ns : str, optional
+        Namespace for the added key-value pairs.
+    max_workers : int, optional
+        Maximum number of imports running at the same time.
+    *args, **kwargs : str, optional
+        Extra arguments passed to ``omero import`` for every target, as in
+        ``ezimport``.
+
+    Returns
+    -------
+    ids : list
+        One entry per target, in the same order as ``targets``, holding the
+        list of Image/Plate ids returned by ``ezimport`` for that target.
+
+    Notes
+    -------
+    Only the ``omero import`` runs happen in worker threads. Everything
+    that uses ``conn`` (finding the imported ids, moving and annotating
+    them) runs afterwards on the calling thread, one target at a time.
+    Project, Dataset and Screen names are resolved (and created, if needed)
+    once, after the imports and only if at least one of them succeeded, so
+    all targets end up in the same containers.
+
+    This function is EXPERIMENTAL and has seen minimal testing. Use at
+    your own risk! We do not recommend using this in production.
+    """
+    if project and not dataset:
+        raise ValueError("Cannot define project but no dataset!")
+    importers = [Importer(conn, target, project, dataset, screen,
+                          ann, ns, *args, **kwargs) for target in targets]
+    if not importers:
+        return []
+    # Importer.ezimport only drives the CLI and never touches ``conn``
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        imported = list(executor.map(Importer.ezimport, importers))
+    if any(imported):
+        project_id = None
+        if project:
+            project_id = set_or_create_project(conn, project)
+        if dataset:
+            dataset = set_or_create_dataset(conn, project_id, dataset)
+        if screen:
+            screen = set_or_create_screen(conn, screen)
+        for imp_ctl in importers:
+            imp_ctl.project = project_id
+            imp_ctl.dataset = dataset
+            imp_ctl.screen = screen
+    return [_organize_import(imp_ctl) for imp_ctl in importers]
+
+
+@functools.lru_cache(maxsize=None)
+def _get_cli_classes():
+    # CLI plugins are heavy to load, so only import them when needed.
+    # A CLI instance keeps a single client around, so only the classes
+    # are cached and every import still gets a fresh CLI.
+    from omero.cli import CLI
+    from omero.plugins.sessions import SessionsControl
+    ImportControl = import_module("omero.plugins.import").ImportControl
+    return CLI, ImportControl, SessionsControl
+
+
+def _container_key(conn: BlitzGateway, kind: str, name: str,
+                   parent_id: Optional[int] = None) -> tuple:
+    # SERVICE_OPTS group changes as other helpers run, so key on the
+    # session's context group instead
+    return (conn.getSession().getUuid().val,
+            conn.getGroupFromContext().getId(),
+            kind, parent_id, name)
+
+
+def _get_created_container(conn: BlitzGateway, key: tuple) -> Optional[int]:
+    # cached ids may have been deleted since, so check they still exist
+    container_id = _created_containers.get(key)
+    if container_id is None:
+        return None
+    if conn.getObject(key[2], container_id) is None:
+        del _created_containers[key]
+        return None
+    return container_id
+
+
 def set_or_create_project(conn: BlitzGateway, project: Union[str, int],
                           across_groups: Optional[bool] = True) -> int:
     """Create or set a Project of interest.
 
-    If argument is a string, creates a new Project with that name. If it is
-    an integer, sets that Project ID as the Project of interest.
+    If argument is a string, creates a new Project with that name, unless
+    one was already created with that name in this session and group and
+    still exists, in which case that Project is reused. If it is an
+    integer, sets that Project ID as the Project of interest.
     Parameter
     ---------
     conn : ``omero.gateway.BlitzGateway`` object.
@@ -93,7 +212,13 @@ def set_or_create_project(conn: BlitzGateway, project: Union[str, int],
         The id of the Project that was either found or created.
     """
     if isinstance(project, str):
+        key = _container_key(conn, 'Project', project)
+        project_id = _get_created_container(conn, key)
+        if project_id is not None:
+            return project_id
         project_id = post_project(conn, project)
+        if project_id is not None:
+            _created_containers[key] = project_id
         print(f'Created new Project:{project_id}')
     elif (isinstance(project, int)):
         project_id = project
@@ -108,9 +233,12 @@ def set_or_create_dataset(conn: BlitzGateway, project_id: Union[int, None],
                           ) -> Union[int, None]:
     """Create or set a Dataset of interest.
 
-    If argument is a string, creates a new Dataset with that name. If it is
-    an integer, sets that Dataset ID as the Dataset of interest. If
-    ``project_id`` is specified, new Dataset will be created in that Project.
+    If argument is a string, creates a new Dataset with that name, unless
+    one was already created with that name (and ``project_id``) in this
+    session and group and still exists, in which case that Dataset is
+    reused. If it is an integer, sets that Dataset ID as the Dataset of
+    interest. If ``project_id`` is specified, new Dataset will be created in
+    that Project.
     Parameter
     ---------
     conn : ``omero.gateway.BlitzGateway`` object.
@@ -125,10 +253,16 @@ def set_or_create_dataset(conn: BlitzGateway, project_id: Union[int, None],
         The id of the Dataset that was either found or created.
     """
     if isinstance(dataset, str):
+        key = _container_key(conn, 'Dataset', dataset, project_id)
+        dataset_id = _get_created_container(conn, key)
+        if dataset_id is not None:
+            return dataset_id
         if project_id:
             dataset_id = post_dataset(conn, dataset, project_id=project_id)
         else:
             dataset_id = post_dataset(conn, dataset)
+        if dataset_id is not None:
+            _created_containers[key] = dataset_id
         print(f'Created new Dataset:{dataset_id}')
     elif (isinstance(dataset, int)):
         dataset_id = dataset
@@ -141,8 +275,10 @@ def set_or_create_screen(conn: BlitzGateway, screen: Union[str, int],
                          across_groups: Optional[bool] = True) -> int:
     """Create or set a Screen of interest.
 
-    If argument is a string, creates a new Screen with that name. If it is
-    an integer, sets that Screen ID as the Screen of interest.
+    If argument is a string, creates a new Screen with that name, unless
+    one was already created with that name in this session and group and
+    still exists, in which case that Screen is reused. If it is an
+    integer, sets that Screen ID as the Screen of interest.
     Parameter
     ---------
     conn : ``omero.gateway.BlitzGateway`` object.
@@ -155,7 +291,13 @@ def set_or_create_screen(conn: BlitzGateway, screen: Union[str, int],
         The id of the Screen that was either found or created.
     """
     if isinstance(screen, str):
+        key = _container_key(conn, 'Screen', screen)
+        screen_id = _get_created_container(conn, key)
+        if screen_id is not None:
+            return screen_id
         screen_id = post_screen(conn, screen)
+        if screen_id is not None:
+            _created_containers[key] = screen_id
         print(f'Created new screen:{screen_id}')
     elif (isinstance(screen, int)):
         screen_id = screen
@@ -174,7 +316,7 @@ def multi_post_map_annotation(conn: BlitzGateway, object_type: str,
     conn : ``omero.gateway.BlitzGateway`` object
         OMERO connection.
     object_type : str
-       OMERO object type, passed to ``BlitzGateway.getObjects``
+       OMERO object type, either ``'Image'`` or ``'Plate'`` (any case).
     object_ids : int or list of ints
         IDs of objects to which the new MapAnnotation will be linked.
     kv_dict : dict
@@ -184,6 +326,11 @@ def multi_post_map_annotation(conn: BlitzGateway, object_type: str,
     Notes
     -----
     All keys and values are converted to strings before saving in OMERO.
+
+    All links are saved in a single call, so if any of ``object_ids`` does
+    not exist or cannot be linked, no links are created and an exception is
+    raised. The MapAnnotation itself has already been saved at that point
+    and is left unlinked.
     Returns
     -------
     map_ann_id : int
@@ -209,18 +356,25 @@ def multi_post_map_annotation(conn: BlitzGateway, object_type: str,
     if type(kv_dict) is not dict:
         raise TypeError('Annotation must be of type `dict`')
 
-    kv_pairs = []
-    for k, v in kv_dict.items():
-        k = str(k)
-        v = str(v)
-        kv_pairs.append([k, v])
+    if type(object_type) is not str:
+        raise TypeError('Object type must be a string')
+    if object_type.lower() not in _ANN_LINK_TYPES:
+        raise ValueError("object_type must be 'Image' or 'Plate'")
+    obj_cls, link_cls = _ANN_LINK_TYPES[object_type.lower()]
+
+    kv_pairs = [[str(k), str(v)] for k, v in kv_dict.items()]
 
     map_ann = MapAnnotationWrapper(conn)
     map_ann.setNs(str(ns))
     map_ann.setValue(kv_pairs)
     map_ann.save()
-    for o in conn.getObjects(object_type, object_ids):
-        o.linkAnnotation(map_ann)
+    links = []
+    for oid in object_ids:
+        link = link_cls()
+        link.setParent(obj_cls(oid, False))
+        link.setChild(MapAnnotationI(map_ann.getId(), False))
+        links.append(link)
+    conn.getUpdateService().saveArray(links, conn.SERVICE_OPTS)
     return map_ann.getId()
 
 
@@ -266,6 +420,8 @@ class Importer:
     getting more image IDs than you were expecting!
     """
 
+    _SUBS_TABLE = str.maketrans("\"*:<>?\\|", "\'x;[]%/!")
+
     def __init__(self, conn: BlitzGateway, file_path: str,
                  project: Optional[Union[str, int]],
                  dataset: Optional[Union[str, int]],
@@ -279,6 +435,14 @@ class Importer:
         self.dataset = dataset
         self.common_args = args
         self.named_args = kwargs
+        self._base_arguments = ['import',
+                                '-k', self.session_uuid,
+                                '-s', conn.host,
+                                '-p', str(conn.port),
+                                *['--{}'.format(v) for v in args],
+                                *['--{}={}'.format(k, v) for k, v in
+                                  kwargs.items()],
+                                self.file_path]
 
         if self.project and not self.dataset:
             raise ValueError("Cannot define project but no dataset!")
@@ -324,10 +488,7 @@ class Importer:
             return self.image_ids
 
     def make_substitutions(self) -> str:
-        fpath = self.file_path
-        mytable = fpath.maketrans("\"*:<>?\\|", "\'x;[]%/!")
-        final_path = fpath.translate(mytable)
-        return final_path
+        return self.file_path.translate(self._SUBS_TABLE)
 
     def get_plate_ids(self) -> Union[List[int], None]:
         """Get the Ids of imported plates.
@@ -348,7 +509,7 @@ class Importer:
             q = self.conn.getQueryService()
             print(q)
             params = Parameters()
-            path_query = str(self.file_path).strip('/')
+            path_query = self.file_path.strip('/')
             print(f"path query: f{path_query}")
             params.map = {"cpath": rstring(path_query)}
             print(params)
@@ -378,17 +539,13 @@ class Importer:
             logging.warning("Missing annotation or namespace, "
                             "skipping annotations")
             return None
-        if self.image_ids:
-            if len(self.image_ids) == 0:
-                logging.error('No image ids to annotate')
-                return None
-            else:
-                map_ann_id = multi_post_map_annotation(self.conn, "Image",
-                                                       self.image_ids,
-                                                       self.ann,
-                                                       self.ns)
-                return map_ann_id
-        return None
+        if not self.image_ids:
+            logging.error('No image ids to annotate')
+            return None
+        map_ann_id = multi_post_map_annotation(self.conn, "Image",
+                                               self.image_ids, self.ann,
+                                               self.ns)
+        return map_ann_id
 
     def annotate_plates(self) -> Union[int, None]:
         """Post map annotation (``self.ann``) to plates ``self.plate_ids``.
@@ -401,17 +558,13 @@ class Importer:
             logging.warning("Missing annotation or namespace, "
                             "skipping annotations")
             return None
-        if self.plate_ids:
-            if len(self.plate_ids) == 0:
-                logging.error('No plate ids to annotate')
-                return None
-            else:
-                map_ann_id = multi_post_map_annotation(self.conn, "Plate",
-                                                       self.plate_ids,
-                                                       self.ann,
-                                                       self.ns)
-                return map_ann_id
-        return None
+        if not self.plate_ids:
+            logging.error('No plate ids to annotate')
+            return None
+        map_ann_id = multi_post_map_annotation(self.conn, "Plate",
+                                               self.plate_ids, self.ann,
+                                               self.ns)
+        return map_ann_id
 
     def organize_images(self) -> bool:
         """Move images to ``self.project``/``self.dataset``.
@@ -423,7 +576,7 @@ class Importer:
         if not self.image_ids:
             logging.error('No image ids to organize')
             return False
-        orphans = get_image_ids(self.conn)
+        orphans = set(get_image_ids(self.conn) or ())
         if self.project:
             project_id = set_or_create_project(self.conn,
                                                self.project)
@@ -435,13 +588,17 @@ class Importer:
                                                self.dataset)
         else:
             dataset_id = None
+        to_link = []
         for im_id in self.image_ids:
             if im_id not in orphans:
                 logging.error(f'Image:{im_id} not an orphan')
             else:
-                if dataset_id:
-                    link_images_to_dataset(self.conn, [im_id], dataset_id)
-                    print(f'Moved Image:{im_id} to Dataset:{dataset_id}')
+                to_link.append(im_id)
+        if dataset_id and to_link:
+            _batch_link_images_to_dataset(self.conn, to_link, dataset_id)
+            for im_id in to_link:
+                logging.debug(f'Moved Image:{im_id} to Dataset:{dataset_id}')
+            print(f'Moved {len(to_link)} Images to Dataset:{dataset_id}')
         return True
 
     def organize_plates(self) -> bool:
@@ -451,17 +608,17 @@ class Importer:
         plate_moved : boolean
             True if plates were found and moved, else False.
         """
-        if self.plate_ids:
-            if len(self.plate_ids) == 0:
-                logging.error('No plate ids to organize')
-                return False
+        if not self.plate_ids:
+            logging.error('No plate ids to organize')
+            return False
+        if self.screen:
+            screen_id = set_or_create_screen(self.conn, self.screen)
+            _batch_link_plates_to_screen(self.conn, self.plate_ids, screen_id)
             for pl_id in self.plate_ids:
-                if self.screen:
-                    screen_id = set_or_create_screen(self.conn, self.screen)
-                    link_plates_to_screen(self.conn, [pl_id], screen_id)
-                    print(f'Moved Plate:{pl_id} to Screen:{screen_id}')
-            return True
-        return False
+                logging.debug(f'Moved Plate:{pl_id} to Screen:{screen_id}')
+            print(f'Moved {len(self.plate_ids)} Plates to '
+                  f'Screen:{screen_id}')
+        return True
 
     def ezimport(self) -> bool:
         """Import file.
@@ -470,27 +627,11 @@ class Importer:
         import_status : boolean
             True if OMERO import returns a 0 exit status, else False.
         """
-        args = ""
-        if self.common_args:
-            args = args + " ".join(self.common_args)
-        if self.named_args:
-            for k, v in self.named_args.items():
-                args = args + " " + str(k) + "=" + str(v)
+        CLI, ImportControl, SessionsControl = _get_cli_classes()
         cli = CLI()
         cli.register('import', ImportControl, '_')
         cli.register('sessions', SessionsControl, '_')
-        arguments = ['import',
-                     '-k', self.conn.getSession().getUuid().val,
-                     '-s', self.conn.host,
-                     '-p', str(self.conn.port)]
-        if self.common_args:
-            str_args = ['--{}'.format(v) for v in self.common_args]
-            arguments.extend(str_args)
-        if self.named_args:
-            str_kwargs = ['--{}={}'.format(k, v) for k, v in
-                          self.named_args.items()]
-            arguments.extend(str_kwargs)
-        arguments.append(str(self.file_path))
+        arguments = list(self._base_arguments)
         print(arguments)
         cli.invoke(arguments)
         if cli.rv == 0:
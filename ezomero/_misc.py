@@ -5,7 +5,7 @@ from omero.gateway import BlitzGateway
 from omero.rtypes import rstring
 from omero.model import DatasetImageLinkI, ImageI, ExperimenterI
 from omero.model import DatasetI, ProjectI, ProjectDatasetLinkI
-from omero.model import PlateI, ScreenI, ScreenPlateLinkI
+from omero.model import PlateI, ScreenI, ScreenPlateLinkI, IObject
 
 
 # filters
@@ -261,6 +261,41 @@ def link_plates_to_screen(conn: BlitzGateway, plate_ids: List[int],
         conn.getUpdateService().saveObject(link, conn.SERVICE_OPTS)
 
 
+def _batch_link_images_to_dataset(conn: BlitzGateway, image_ids: List[int],
+                                  dataset_id: int):
+    """Like ``link_images_to_dataset``, but saves all links in one call.
+
+    Either all links are saved or, if any of them fails, none are.
+    """
+    children = [ImageI(im_id, False) for im_id in image_ids]
+    _save_links(conn, DatasetImageLinkI, DatasetI(dataset_id, False),
+                children)
+
+
+def _batch_link_plates_to_screen(conn: BlitzGateway, plate_ids: List[int],
+                                 screen_id: int):
+    """Like ``link_plates_to_screen``, but saves all links in one call.
+
+    Either all links are saved or, if any of them fails, none are.
+    """
+    children = [PlateI(pid, False) for pid in plate_ids]
+    _save_links(conn, ScreenPlateLinkI, ScreenI(screen_id, False), children)
+
+
+def _save_links(conn: BlitzGateway, link_cls: type, parent: IObject,
+                children: List[IObject]):
+    user_id = _get_current_user(conn)
+    links = []
+    for child in children:
+        link = link_cls()
+        link.setParent(parent)
+        link.setChild(child)
+        link.details.owner = ExperimenterI(user_id, False)
+        links.append(link)
+    if links:
+        conn.getUpdateService().saveArray(links, conn.SERVICE_OPTS)
+
+
 def _get_current_user(conn: BlitzGateway) -> int:
     userid = conn.SERVICE_OPTS.getOmeroUser()
     if userid is None:
@@ -1,5 +1,10 @@
 import ezomero
+import subprocess
+import sys
 from io import StringIO
+import pytest
+from ezomero._importer import set_or_create_dataset
+from ezomero._importer import multi_post_map_annotation
 
 # Test imports
 
@@ -30,6 +35,25 @@ def test_ezimport(conn, monkeypatch):
     monkeypatch.setattr('sys.stdin', io)
     id = ezomero.ezimport(conn, fpath)
     assert len(id) == 2
+    conn.deleteObjects("Image", id, wait=True)
+
+#     # test simple import, with annotation
+    fpath = "tests/data/vsi-ets-test-jpg2k.vsi"
+    ns = "test_ezimport_ns"
+    str_input = ["omero", 'import',
+                 '-k', conn.getSession().getUuid().val,
+                 '-s', conn.host,
+                 '-p', str(conn.port),
+                 fpath, "\n"]
+    io = StringIO(" ".join(str_input))
+    monkeypatch.setattr('sys.stdin', io)
+    id = ezomero.ezimport(conn, fpath, ann={'key': 'value'}, ns=ns)
+    assert len(id) == 2
+    map_ann_ids = [ezomero.get_map_annotation_ids(conn, "Image", im_id, ns=ns)
+                   for im_id in id]
+    assert len(map_ann_ids[0]) == 1
+    assert all(ids == map_ann_ids[0] for ids in map_ann_ids)
+    conn.deleteObjects("Image", id, deleteAnns=True, wait=True)
 
 #     # test simple import, new orphan dataset
     fpath = "tests/data/test_pyramid.ome.tif"
@@ -114,3 +138,57 @@ def test_ezimport(conn, monkeypatch):
     assert im_ids[-1] == id[-1]
 
     conn.deleteObjects("Project", [proj_id], deleteChildren=True)
+
+
+def test_ezimport_lazy_cli():
+    # importing ezomero should not pull in the OMERO CLI plugins
+    code = ("import sys, ezomero; "
+            "assert 'omero.cli' not in sys.modules; "
+            "assert 'omero.plugins.import' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_ezimport_many(conn):
+    assert ezomero.ezimport_many(conn, [], dataset="test_many_ds") == []
+    ds_names = [ds.getName() for ds in conn.getObjects("Dataset")]
+    assert "test_many_ds" not in ds_names
+
+    fpaths = ["tests/data/test_pyramid.ome.tif",
+              "tests/data/vsi-ets-test-jpg2k.vsi"]
+    ids = ezomero.ezimport_many(conn, fpaths, dataset="test_many_ds",
+                                max_workers=2)
+    assert len(ids) == 2
+    assert len(ids[0]) == 1
+    assert len(ids[1]) == 2
+    ds_id = conn.getObject("Image", ids[0][0]).getParent().getId()
+    im_ids = ezomero.get_image_ids(conn, dataset=ds_id)
+    assert sorted(ids[0] + ids[1]) == sorted(im_ids)
+    conn.deleteObjects("Dataset", [ds_id], deleteChildren=True, wait=True)
+
+
+def test_set_or_create_dataset(conn):
+    ds_id = set_or_create_dataset(conn, None, "test_reuse_ds")
+    assert set_or_create_dataset(conn, None, "test_reuse_ds") == ds_id
+    # across-groups getters change SERVICE_OPTS; the cached id must survive
+    _ = ezomero.get_dataset_ids(conn)
+    assert set_or_create_dataset(conn, None, "test_reuse_ds") == ds_id
+    conn.deleteObjects("Dataset", [ds_id], wait=True)
+    new_ds_id = set_or_create_dataset(conn, None, "test_reuse_ds")
+    assert new_ds_id != ds_id
+    assert conn.getObject("Dataset", new_ds_id) is not None
+    conn.deleteObjects("Dataset", [new_ds_id], wait=True)
+
+
+def test_multi_post_map_annotation(conn, screen_structure):
+    plate_id = screen_structure[0]
+    ns = "test_multi_post_ns"
+    map_ann_id = multi_post_map_annotation(conn, "plate", plate_id,
+                                           {'key': 'value'}, ns)
+    map_ann_ids = ezomero.get_map_annotation_ids(conn, "Plate", plate_id,
+                                                 ns=ns)
+    assert map_ann_ids == [map_ann_id]
+    conn.deleteObjects("Annotation", [map_ann_id], wait=True)
+
+    with pytest.raises(ValueError):
+        _ = multi_post_map_annotation(conn, "Dataset", plate_id,
+                                      {'key': 'value'}, ns)